@@ -4,10 +4,35 @@
  *
  * Persistent Node.js process that renders Markdoc pages for the MkDocs plugin.
  *
- * Protocol (newline-delimited JSON over stdin/stdout):
- *   Request  → {"markdown": "..."}
- *   Response → {"html": "...", "warnings": [...]}
- *             | {"error": "..."}
+ * Protocol (length-prefixed frames over stdin/stdout):
+ *   Every frame is a 4-byte big-endian byte length followed by that many
+ *   bytes.
+ *
+ *   Request  → <page count> then one frame of UTF-8 Markdown per page
+ *   Response → per page, in request order:
+ *                a JSON frame  {"toc": [...], "warnings": [...]}
+ *                            | {"error": "..."}
+ *                a frame of raw UTF-8 HTML (empty on error)
+ *
+ *   toc lists every rendered heading that has an id, in document order, as
+ *   {"level": 2, "id": "intro", "text": "Intro"} — the plugin builds the
+ *   MkDocs table of contents from it without re-parsing the HTML.
+ *
+ *   A whole request is read before any page is rendered, so the plugin can
+ *   write it in full before it starts reading responses.  Each page's reply
+ *   is written as soon as that page is rendered, and the next page is only
+ *   rendered once that reply has been handed to the pipe, so the plugin can
+ *   apply its timeout to every page separately.
+ *
+ *   Handshake → once started, before reading any request, the runner writes
+ *               a single JSON frame
+ *                 {"ready": true, "markdoc": "0.4.0", "node": "v20.11.0",
+ *                  "modules": ["/abs/path/markdoc.config.js", ...]}
+ *               or {"error": "..."} if Markdoc or the user config could not
+ *               be loaded (it then exits).  markdoc, node and modules (every
+ *               file loaded through require(), user config included) let the
+ *               plugin key its render cache on everything besides the page
+ *               source that can change the output.
  *
  * Built-in defaults (user config can override any of these):
  *
@@ -34,7 +59,6 @@
 
 const path = require("path");
 const fs = require("fs");
-const readline = require("readline");
 
 // ---------------------------------------------------------------------------
 // Argument parsing
@@ -50,6 +74,27 @@ function parseArgs(argv) {
   return args;
 }
 
+// ---------------------------------------------------------------------------
+// Framing
+// ---------------------------------------------------------------------------
+
+function frame(body) {
+  const header = Buffer.allocUnsafe(4);
+  header.writeUInt32BE(body.length, 0);
+  return [header, body];
+}
+
+function jsonFrame(value) {
+  return frame(Buffer.from(JSON.stringify(value), "utf8"));
+}
+
+// Report a fatal startup error on stderr and in the handshake frame, then exit.
+function failStartup(message) {
+  process.stderr.write(message + "\n");
+  process.stdout.write(Buffer.concat(jsonFrame({ error: message })));
+  process.exit(1);
+}
+
 // ---------------------------------------------------------------------------
 // Startup – load Markdoc and optional user config once
 // ---------------------------------------------------------------------------
@@ -58,16 +103,34 @@ let Markdoc;
 try {
   Markdoc = require("@markdoc/markdoc");
 } catch (err) {
-  process.stderr.write(
+  failStartup(
     "@markdoc/markdoc is not installed. " +
       "Run `npm install @markdoc/markdoc` in the plugin directory or globally.\n" +
-      err.message + "\n"
+      err.message
   );
-  process.exit(1);
 }
 
 const { nodes: defaultNodes, Tag } = Markdoc;
 
+// Version of the installed @markdoc/markdoc, or null if it cannot be found.
+function markdocVersion() {
+  try {
+    let dir = path.dirname(require.resolve("@markdoc/markdoc"));
+    for (;;) {
+      const file = path.join(dir, "package.json");
+      if (fs.existsSync(file)) {
+        const pkg = JSON.parse(fs.readFileSync(file, "utf8"));
+        if (pkg.name === "@markdoc/markdoc") return pkg.version;
+      }
+      const parent = path.dirname(dir);
+      if (parent === dir) return null;
+      dir = parent;
+    }
+  } catch (err) {
+    return null;
+  }
+}
+
 function loadUserConfig(configPath) {
   if (!configPath) return null;
   if (!fs.existsSync(configPath)) {
@@ -86,8 +149,7 @@ let userConfigSource;
 try {
   userConfigSource = loadUserConfig(args.configPath);
 } catch (err) {
-  process.stderr.write(`mkdocs-markdoc: failed to load config: ${err.message}\n`);
-  process.exit(1);
+  failStartup(`mkdocs-markdoc: failed to load config: ${err.message}`);
 }
 
 // ---------------------------------------------------------------------------
@@ -118,6 +180,38 @@ function extractText(children) {
     .join("");
 }
 
+// Heading text as the HTML renderer prints it, numbers included (e.g. from
+// {% $frontmatter.version %}).  extractText skips them and is kept as is,
+// since changing it would change existing heading ids.
+function renderedText(children) {
+  return (children || [])
+    .map((child) => {
+      if (typeof child === "string") return child;
+      if (typeof child === "number") return String(child);
+      if (Array.isArray(child)) return renderedText(child);
+      if (child && child.children) return renderedText(child.children);
+      return "";
+    })
+    .join("");
+}
+
+const HEADING_TAG = /^h([1-6])$/;
+
+function collectHeadings(node, out) {
+  if (Array.isArray(node)) {
+    for (const child of node) collectHeadings(child, out);
+  } else if (node && typeof node === "object") {
+    const m = typeof node.name === "string" && node.name.match(HEADING_TAG);
+    const id = m && node.attributes && node.attributes.id;
+    if (id) {
+      out.push({ level: Number(m[1]), id: String(id), text: renderedText(node.children).trim() });
+    } else if (node.children) {
+      collectHeadings(node.children, out);
+    }
+  }
+  return out;
+}
+
 // ---------------------------------------------------------------------------
 // Built-in stateless nodes + tags (defined once at module level)
 // ---------------------------------------------------------------------------
@@ -392,32 +486,141 @@ function renderMarkdoc(source) {
 
   const renderableTree = Markdoc.transform(ast, markdocConfig);
   const html = Markdoc.renderers.html(renderableTree);
-  return { html, warnings };
+  const toc = collectHeadings(renderableTree, []);
+  return { html, toc, warnings };
 }
 
 // ---------------------------------------------------------------------------
-// Main loop
+// Warm-up
+//
+// Render a small page exercising the common node types once at startup,
+// before any request is read.  V8 compiles functions lazily on first call,
+// so without this the first real page of every worker also pays for
+// compiling Markdoc's tokenizer, validator, transformer and renderer.
+// Requests that arrive meanwhile simply wait in the stdin pipe.  Failures
+// are ignored: a broken user config is reported against the first real page.
 // ---------------------------------------------------------------------------
 
-const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+const WARMUP_SOURCE = [
+  "---",
+  "title: Warm-up",
+  "---",
+  "# Heading {% #warmup %}",
+  "",
+  "Some *emphasis*, **strong**, `code` and a [link](page.md).",
+  "",
+  "- item",
+  "- item",
+  "",
+  "| a | b |",
+  "|---|---|",
+  "| 1 | 2 |",
+  "",
+  "```js",
+  "const x = 1;",
+  "```",
+  "",
+  "{% callout type=\"note\" %}",
+  "Callout body.",
+  "{% /callout %}",
+  "",
+].join("\n");
 
-rl.on("line", (line) => {
-  if (!line.trim()) return;
+try {
+  renderMarkdoc(WARMUP_SOURCE);
+} catch (err) {
+  // Ignored – see above.
+}
+
+// ---------------------------------------------------------------------------
+// Main loop
+// ---------------------------------------------------------------------------
 
-  let markdown;
+function renderPage(source) {
+  let meta;
+  let html = "";
   try {
-    ({ markdown } = JSON.parse(line));
+    const result = renderMarkdoc(source);
+    meta = { toc: result.toc, warnings: result.warnings };
+    html = result.html;
   } catch (err) {
-    process.stdout.write(JSON.stringify({ error: `Invalid request JSON: ${err.message}` }) + "\n");
-    return;
+    meta = { error: err.message };
   }
+  return [jsonFrame(meta), frame(Buffer.from(html, "utf8"))];
+}
 
-  try {
-    const { html, warnings } = renderMarkdoc(markdown);
-    process.stdout.write(JSON.stringify({ html, warnings }) + "\n");
-  } catch (err) {
-    process.stdout.write(JSON.stringify({ error: err.message }) + "\n");
+// Incoming bytes are buffered until a whole frame is available.
+const chunks = [];
+let buffered = 0;
+
+function take(n) {
+  if (buffered < n) return null;
+  const all = chunks.length === 1 ? chunks[0] : Buffer.concat(chunks, buffered);
+  chunks.length = 0;
+  buffered -= n;
+  if (buffered > 0) chunks.push(all.subarray(n));
+  return all.subarray(0, n);
+}
+
+let pageCount = null;   // pages still expected in the current request
+let frameLength = null; // length of the Markdown frame being received
+let sources = [];
+let rendering = false;  // a request is being rendered; later ones wait
+
+// Render *batch* from page *i* on, one page at a time.  process.stdout queues
+// writes in memory while the pipe is full, so before rendering the next page
+// we wait for the queue to drain: otherwise a large reply, and every reply
+// after it, would only reach the plugin once the whole batch was rendered.
+function renderFrom(batch, i) {
+  while (i < batch.length) {
+    const flushed = process.stdout.write(Buffer.concat(renderPage(batch[i++]).flat()));
+    if (!flushed) {
+      process.stdout.once("drain", () => {
+        renderFrom(batch, i);
+        pump();
+      });
+      return;
+    }
+  }
+  rendering = false;
+}
+
+function pump() {
+  while (!rendering) {
+    if (pageCount === null) {
+      const header = take(4);
+      if (!header) return;
+      pageCount = header.readUInt32BE(0);
+      sources = [];
+    }
+    while (sources.length < pageCount) {
+      if (frameLength === null) {
+        const header = take(4);
+        if (!header) return;
+        frameLength = header.readUInt32BE(0);
+      }
+      const body = take(frameLength);
+      if (!body) return;
+      frameLength = null;
+      sources.push(body.toString("utf8"));
+    }
+    pageCount = null;
+    rendering = true;
+    renderFrom(sources, 0);
   }
+}
+
+process.stdout.write(Buffer.concat(jsonFrame({
+  ready: true,
+  markdoc: markdocVersion(),
+  node: process.version,
+  modules: Object.keys(require.cache).filter((file) => file !== __filename),
+})));
+
+process.stdin.on("data", (chunk) => {
+  chunks.push(chunk);
+  buffered += chunk.length;
+  pump();
 });
 
-rl.on("close", () => { process.exit(0); });
+process.stdin.on("end", () => { process.exit(0); });
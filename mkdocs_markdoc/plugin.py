@@ -5,19 +5,27 @@ Stripe's Markdoc, via a pool of persistent Node.js subprocesses.
 
 from __future__ import annotations
 
+import errno
+import hashlib
 import json
 import logging
 import os
 import posixpath
 import re
+import selectors
 import shutil
+import struct
 import subprocess
+import sys
+import tempfile
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from html.parser import HTMLParser
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from html import unescape
 from pathlib import Path
 from queue import Empty, Queue
-from typing import Any
+from typing import IO, Any
 from urllib.parse import urlsplit
 
 from mkdocs.config import config_options
@@ -32,55 +40,139 @@ log = logging.getLogger("mkdocs.plugins.markdoc")
 # Absolute path to the bundled Node.js runner so it works regardless of cwd.
 _RUNNER_PATH = Path(__file__).parent / "markdoc_runner.js"
 
-_HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+# Markdoc emits well-formed, lowercase heading tags with double-quoted
+# attributes, so a regex scan is enough to find them.
+_HEADING_RE = re.compile(r'<(h[1-6])\b[^>]*?\sid="([^"]*)"[^>]*>(.*?)</\1>', re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_HEADING_CLOSERS = frozenset({"1>", "2>", "3>", "4>", "5>", "6>"})
 
+# Upper bound on pages per batch request.  Smaller batches let the first pages
+# reach on_page_markdown sooner and keep faster workers fed with more work.
+_MAX_BATCH = 32
 
-class _HeadingParser(HTMLParser):
-    """Extract heading text + existing id attributes from rendered HTML."""
+# Length prefix of every frame exchanged with the runner (see _request).
+_FRAME_HEADER = struct.Struct(">I")
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.headings: list[dict] = []
-        self._tag: str = ""
-        self._id: str = ""
-        self._text: list[str] = []
-
-    def handle_starttag(self, tag: str, attrs: list) -> None:
-        if tag in _HEADING_TAGS:
-            self._tag = tag
-            self._id = dict(attrs).get("id", "")
-            self._text = []
-
-    def handle_endtag(self, tag: str) -> None:
-        if tag == self._tag and tag in _HEADING_TAGS:
-            self.headings.append({
-                "level": int(self._tag[1]),
-                "id": self._id,
-                "text": "".join(self._text).strip(),
-            })
-            self._tag = ""
-
-    def handle_data(self, data: str) -> None:
-        if self._tag:
-            self._text.append(data)
-
-
-def _toc_from_html(html: str) -> TableOfContents:
+# Linux-only fcntl command to resize a pipe (not exported by fcntl before 3.10).
+_F_SETPIPE_SZ = 1031
+_PIPE_SIZE = 1 << 20
+_DEFAULT_PIPE_SIZE = 1 << 16
+
+
+def _pipe_size(n_pipes: int) -> int:
+    """
+    Buffer size to request for each of *n_pipes* worker pipes, or 0 to keep
+    the kernel default.
+
+    At most _PIPE_SIZE, /proc/sys/fs/pipe-max-size, and an even share of half
+    the per-user soft limit in /proc/sys/fs/pipe-user-pages-soft: past that
+    limit the kernel refuses resizes and also shrinks every new pipe the user
+    creates to two pages.
+    """
+    size = _PIPE_SIZE
+    try:
+        size = min(size, int(Path("/proc/sys/fs/pipe-max-size").read_text()))
+    except (OSError, ValueError):
+        pass
+    try:
+        soft_pages = int(Path("/proc/sys/fs/pipe-user-pages-soft").read_text())
+    except (OSError, ValueError):
+        soft_pages = 0
+    if soft_pages:
+        size = min(size, soft_pages * os.sysconf("SC_PAGE_SIZE") // 2 // n_pipes)
+    return size if size > _DEFAULT_PIPE_SIZE else 0
+
+
+def _enlarge_pipe(fd: int, size: int) -> bool:
+    """
+    Raise the kernel buffer of pipe *fd* from the 64 KiB default to *size*.
+
+    Node.js queues a reply that does not fit in the pipe in memory, and the
+    runner waits for that queue to drain before rendering the next page; a
+    larger pipe takes a big reply at once, so the runner moves on without
+    waiting for Python to read it.  Best effort: returns False only when the
+    kernel refused with EPERM, meaning the user's pipe limit is spent and
+    further resizes are pointless.
+    """
+    import fcntl
+
+    try:
+        fcntl.fcntl(fd, _F_SETPIPE_SZ, size)
+    except OSError as exc:
+        return exc.errno != errno.EPERM
+    return True
+
+
+def _read_frames(stream: IO[bytes], frames: Queue[bytes | None]) -> None:
+    """
+    Move length-prefixed frames from *stream* into *frames* until EOF.
+
+    Used where pipes cannot be select()ed on (Windows): the blocking reads
+    happen on this thread, so _read_frame can wait on the queue with a
+    timeout instead.  None is queued once the stream ends.
+    """
+    try:
+        while len(header := stream.read(_FRAME_HEADER.size)) == _FRAME_HEADER.size:
+            (n,) = _FRAME_HEADER.unpack(header)
+            body = stream.read(n)
+            if len(body) < n:
+                break
+            frames.put(body)
+    except (OSError, ValueError):
+        pass
+    frames.put(None)
+
+
+def _usable_cpus() -> int:
+    """Number of CPUs this process may run on, honouring taskset/cpuset limits."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def _headings_end(html: str) -> int:
+    """Return the offset just past the last </hN> in *html*, or -1 if none."""
+    end = len(html)
+    while (end := html.rfind("</h", 0, end)) != -1:
+        if html[end + 3:end + 5] in _HEADING_CLOSERS:
+            return end + 5
+    return -1
+
+
+def _headings_from_html(html: str) -> Iterator[dict]:
+    """
+    Yield heading level, id and text from <hN id="..."> elements in the HTML.
+
+    The regex scan stops at the last closing heading tag, so trailing prose,
+    code blocks and tables after the final heading are never examined.  As
+    a generator it feeds _toc_from_headings directly, without building an
+    intermediate list.
+    """
+    end = _headings_end(html)
+    if end == -1:
+        return
+    for m in _HEADING_RE.finditer(html, 0, end):
+        yield {
+            "level": int(m.group(1)[1]),
+            "id": m.group(2),
+            "text": unescape(_TAG_RE.sub("", m.group(3))).strip(),
+        }
+
+
+def _toc_from_headings(headings: Iterable[dict]) -> TableOfContents:
     """
-    Build a MkDocs TableOfContents from <hN id="..."> elements in the HTML.
+    Build a MkDocs TableOfContents from a flat, document-ordered heading list.
 
     The heading node override in markdoc.config.js guarantees every heading
     already carries an id attribute, so no HTML modification is needed here.
     Headings without an id (e.g. those inside custom tag blocks that swallow
     them) are silently skipped.
     """
-    parser = _HeadingParser()
-    parser.feed(html)
-
     top: list[AnchorLink] = []
     stack: list[AnchorLink] = []
 
-    for h in parser.headings:
+    for h in headings:
         if not h["id"]:
             continue
         link = AnchorLink(title=h["text"], id=h["id"], level=h["level"])
@@ -106,30 +198,52 @@ class MarkdocPluginConfig(Config):
     # Milliseconds before a single-page render is killed and an error raised.
     timeout = config_options.Type(int, default=30_000)
 
-    # Number of parallel Node.js worker processes.  0 = auto (cpu_count).
+    # Number of parallel Node.js worker processes.  0 = auto (usable CPUs).
+    # Never more workers are started than there are pages to render.
     workers = config_options.Type(int, default=0)
 
     # Optional permalink symbol appended to each heading.  Empty = disabled.
     permalink = config_options.Type(str, default="")
 
+    # Opt-in: cache rendered pages in .markdoc_cache/ next to mkdocs.yml
+    # across builds.
+    cache = config_options.Type(bool, default=False)
+
 
 class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
     """
     Intercepts raw Markdown on every page and hands it to a pool of persistent
-    Node.js Markdoc workers.  All pages are pre-rendered in parallel during
-    on_env so that on_page_markdown is just a cache lookup.
+    Node.js Markdoc workers.  All pages are pre-rendered in batches during
+    on_files so that on_page_markdown is just a cache lookup.
 
     Lifecycle
     ---------
-    on_config        – validate Node.js, start the worker pool.
-    on_files         – inject the bundled markdoc.css asset.
-    on_env           – pre-render all pages in parallel; populate cache.
-    on_page_markdown – return the cached HTML (or render synchronously on miss).
-    on_page_content  – rewrite .md hrefs; rebuild TOC; optionally inject permalink anchors.
+    on_config        – locate Node.js.
+    on_files         – inject the bundled markdoc.css asset; start the worker
+                       pool; submit all pages for rendering in batches.
+    on_page_markdown – wait for and return the page's HTML (or render
+                       synchronously on miss).
+    on_page_content  – rewrite .md hrefs; build TOC from the runner's heading list;
+                       optionally inject permalink anchors.
+    on_post_build    – prune render cache entries this build did not use.
     on_shutdown      – terminate all worker processes.
+
+    MkDocs keeps one plugin instance for every rebuild of `mkdocs serve`, so
+    on_config also stops the pool left over from the previous build.
     """
 
+    def __init__(self) -> None:
+        super().__init__()
+        self._workers: list[subprocess.Popen] = []
+        self._selectors: dict[subprocess.Popen, selectors.BaseSelector] = {}
+        self._frames: dict[subprocess.Popen, Queue[bytes | None]] = {}
+        self._handshake: dict = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: dict[str, tuple[Future[list[dict]], int]] = {}
+
     def on_config(self, config: dict[str, Any]) -> dict[str, Any]:
+        self._stop_pool()
+
         node_exec = self.config["node_path"]
 
         # Resolve "node" to a full path so the error message is unambiguous.
@@ -144,82 +258,120 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
         self._node_exec = resolved
         log.debug("mkdocs-markdoc: using Node.js at %s", resolved)
 
+        # Options read on every page, hoisted out of the Config mapping.
+        self._timeout_ms: int = self.config["timeout"]
+        self._permalink: str = self.config["permalink"]
+
+        # Worker pipe buffer size, shared out over the most workers a build
+        # can start (two pipes each); 0 keeps the kernel default.
+        self._pipe_size = 0
+        if sys.platform.startswith("linux"):
+            self._pipe_size = _pipe_size(2 * (self.config["workers"] or _usable_cpus()))
+
         # Inject the bundled stylesheet so it loads before any user extra_css.
         config.setdefault("extra_css", []).insert(0, "assets/markdoc.css")
 
-        # Verify @markdoc/markdoc is installed where the runner can reach it.
-        check = self._run_node(
-            "require('@markdoc/markdoc'); process.stdout.write('ok');"
-        )
-        if check.returncode != 0 or check.stdout.strip() != "ok":
-            stderr = check.stderr.strip()
-            raise RuntimeError(
-                "mkdocs-markdoc: @markdoc/markdoc is not importable from the "
-                "Node.js runner.  Run `npm install @markdoc/markdoc` (globally "
-                f"or in the project directory).\nNode stderr: {stderr}"
-            )
-
-        # Start the worker pool.
-        n = self.config["workers"] or os.cpu_count() or 1
-        self._workers: list[subprocess.Popen] = []
+        # The worker pool is started in on_files, once the page count is known.
+        # Each worker checks that @markdoc/markdoc is importable as it starts.
         self._pool: Queue[subprocess.Popen] = Queue()
-        for _ in range(n):
-            w = self._start_worker()
-            self._workers.append(w)
-            self._pool.put(w)
 
-        # Per-build render cache and error store populated by on_env.
-        self._cache: dict[str, str] = {}
-        self._cache_errors: dict[str, Exception] = {}
+        # Per-build render state populated by on_files: runner responses served
+        # from the on-disk cache, and each page's in-flight batch render plus
+        # its index in that batch (self._pending).
+        self._cache: dict[str, dict] = {}
+
+        # Heading lists reported by the runner, consumed by on_page_content.
+        self._tocs: dict[str, list[dict]] = {}
+
+        # On-disk render cache shared across builds.  The key salt is computed
+        # in on_files, from the first worker's handshake; entries this build
+        # did not use are removed in on_post_build.
+        self._cache_dir: Path | None = None
+        self._cache_used: set[Path] = set()
+        if self.config["cache"]:
+            config_dir = Path(config["config_file_path"] or config["site_dir"]).parent
+            self._cache_dir = config_dir / ".markdoc_cache"
 
-        log.debug("mkdocs-markdoc: started %d Node.js worker(s)", n)
         return config
 
     def on_files(self, files: Files, config: dict[str, Any], **kwargs: Any) -> Files:
-        """Inject the bundled markdoc.css into the MkDocs file collection."""
+        """
+        Inject the bundled markdoc.css and pre-render every documentation page.
+
+        MkDocs calls on_page_markdown for each page before on_env runs, so
+        this is the last point at which all pages can be rendered up front.
+        Pages are split into batches of up to _MAX_BATCH and each batch is
+        sent as a single request, so a worker pays one pipe round-trip per
+        batch instead of one per page.
+
+        Pages whose rendered output is already in the on-disk cache are
+        served from it and never reach Node.js, and pages with identical
+        sources are rendered only once.  The worker pool is started
+        here rather than in on_config so it can be sized to the site: never
+        more Node.js processes than there are pages left to render.  With the
+        cache enabled, one worker is started before the lookup, since the
+        cache key includes what the runner reports in its handshake.
+
+        Batches are only submitted here, not waited for: MkDocs goes on to
+        process pages while the workers are still rendering later batches,
+        and on_page_markdown waits for just the batch holding its page.
+        """
         files.append(File(
             path="assets/markdoc.css",
             src_dir=str(Path(__file__).parent),
             dest_dir=config["site_dir"],
             use_directory_urls=config["use_directory_urls"],
         ))
-        return files
-
-    def on_env(self, env: Any, config: dict[str, Any], files: Files, **kwargs: Any) -> Any:
-        """
-        Pre-render all documentation pages in parallel before MkDocs starts
-        calling on_page_markdown sequentially.
 
-        Each worker process handles one page at a time; the ThreadPoolExecutor
-        keeps all workers busy while Python waits for results.
-        """
-        n_workers = len(self._workers)
-        doc_files = list(files.documentation_pages())
+        # The cache key depends on what the runner reports in its handshake,
+        # so one worker has to be up before the cache can be consulted.
+        if self._cache_dir is not None:
+            self._start_pool(1)
+            self._cache_salt = self._cache_key_salt()
+
+        # Serve unchanged pages from the on-disk cache; only the rest go to
+        # Node, once per distinct source.
+        pending: dict[bytes, list[str]] = {}
+        for f in files.documentation_pages():
+            source = Path(f.abs_src_path).read_bytes()
+            if source in pending:
+                pending[source].append(f.src_path)
+                continue
+            response = self._load_rendered(source)
+            if response is None:
+                pending[source] = [f.src_path]
+            else:
+                self._cache[f.src_path] = response
+
+        n_workers = min(self.config["workers"] or _usable_cpus(), len(pending) or 1)
+        self._start_pool(n_workers - len(self._workers))
+        if not pending:
+            return files
 
         log.debug(
-            "mkdocs-markdoc: pre-rendering %d page(s) across %d worker(s)",
-            len(doc_files),
+            "mkdocs-markdoc: pre-rendering %d page(s) across %d worker(s), "
+            "%d page(s) served from the render cache",
+            len(pending),
             n_workers,
+            len(self._cache),
         )
 
-        with ThreadPoolExecutor(max_workers=n_workers) as executor:
-            future_to_path = {
-                executor.submit(
-                    self._render_with_pool,
-                    Path(f.abs_src_path).read_text(encoding="utf-8"),
-                    f.src_path,
-                ): f.src_path
-                for f in doc_files
-            }
-
-            for future in as_completed(future_to_path):
-                src_path = future_to_path[future]
-                try:
-                    self._cache[src_path] = future.result()
-                except Exception as exc:  # noqa: BLE001
-                    self._cache_errors[src_path] = exc
+        items = list(pending.items())
+        size = min(-(-len(items) // n_workers), _MAX_BATCH)
+        batches = [items[i:i + size] for i in range(0, len(items), size)]
+
+        self._executor = ThreadPoolExecutor(max_workers=n_workers)
+        for batch in batches:
+            future = self._executor.submit(
+                self._render_batch_with_pool,
+                [source for source, _ in batch],
+                [src_paths[0] for _, src_paths in batch],
+            )
+            for index, (_, src_paths) in enumerate(batch):
+                for src_path in src_paths:
+                    self._pending[src_path] = (future, index)
 
-        return env
+        return files
 
     # ------------------------------------------------------------------
     # Core hooks
@@ -233,27 +385,29 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
         **kwargs: Any,
     ) -> str:
         """
-        Return the HTML that was pre-rendered in on_env.
+        Return the HTML that was pre-rendered in on_files, waiting for the
+        page's batch to finish if it is still in flight.
 
         Falls back to synchronous rendering on a cache miss (e.g. when another
-        plugin modifies the markdown after on_env runs).
+        plugin adds pages after on_files runs).
         """
         src_path = page.file.src_path
 
-        if src_path in self._cache_errors:
-            raise self._cache_errors.pop(src_path)
-
         if src_path in self._cache:
-            return self._cache.pop(src_path)
+            return self._unpack(self._cache.pop(src_path), src_path)
+
+        if src_path in self._pending:
+            future, index = self._pending.pop(src_path)
+            return self._unpack(future.result()[index], src_path)
 
         # Cache miss (e.g. during mkdocs serve hot-reload) – render synchronously.
         # Read the original file rather than using the stripped `markdown` arg
         # so that front matter is available to parseFrontmatter in the runner.
         log.debug("mkdocs-markdoc: cache miss for '%s', rendering synchronously", src_path)
         try:
-            source = Path(page.file.abs_src_path).read_text(encoding="utf-8")
+            source = Path(page.file.abs_src_path).read_bytes()
         except OSError:
-            source = markdown
+            source = markdown.encode("utf-8")
         return self._render_with_pool(source, src_path)
 
     def on_page_content(
@@ -269,21 +423,55 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
 
         Because we bypass Python-Markdown entirely, page.toc is empty after
         page.render() — the toc extension never sees any Markdown headings.
-        We rebuild it here by parsing the id-annotated <hN> elements that
-        the heading node override in markdoc.config.js already produced.
+        We rebuild it here from the heading list the runner collected from
+        Markdoc's renderable tree, falling back to scanning the id-annotated
+        <hN> elements in the HTML if the page was not rendered by us.
 
         We also rewrite any raw .md hrefs that Markdoc emitted, since
         Python-Markdown's link-rewriter never ran on our output.
         """
         if files is not None:
             html = self._rewrite_md_links(html, page, files)
-        page.toc = _toc_from_html(html)
-        if self.config["permalink"]:
+        headings = self._tocs.pop(page.file.src_path, None)
+        if headings is None:
+            headings = _headings_from_html(html)
+        page.toc = _toc_from_headings(headings)
+        if self._permalink:
             html = self._inject_permalinks(html)
         return html
 
+    def on_post_build(self, config: dict[str, Any], **kwargs: Any) -> None:
+        """
+        Remove render cache entries that no page of this build used.
+
+        This keeps .markdoc_cache/ to one entry per current page: entries
+        for edited or deleted pages, or keyed on an older Markdoc, Node.js or
+        config, would otherwise accumulate forever.
+        """
+        if self._cache_dir is None:
+            return
+        for entry in self._cache_dir.glob("*/*.json"):
+            if entry not in self._cache_used:
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+        self._cache_used.clear()
+
     def on_shutdown(self) -> None:
         """Terminate all worker processes in the pool."""
+        self._stop_pool()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _stop_pool(self) -> None:
+        """Cancel outstanding renders and stop every worker process."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
         for worker in self._workers:
             if worker.poll() is None:
                 worker.stdin.close()
@@ -291,81 +479,246 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
                     worker.wait(timeout=5)
                 except subprocess.TimeoutExpired:
                     worker.kill()
+        for sel in self._selectors.values():
+            sel.close()
+        if self._workers:
+            log.debug("mkdocs-markdoc: all Node.js workers stopped")
         self._workers.clear()
-        log.debug("mkdocs-markdoc: all Node.js workers stopped")
+        self._selectors.clear()
+        self._frames.clear()
 
-    # ------------------------------------------------------------------
-    # Helpers
-    # ------------------------------------------------------------------
+    def _start_pool(self, n: int) -> None:
+        """
+        Start *n* persistent workers and make them available in the pool.
+
+        Workers are spawned and handshaken concurrently, so startup costs one
+        Node.js launch rather than *n* of them.  Workers that did start are
+        tracked even if another one fails, so on_shutdown still reaps them.
+        """
+        if n <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=n) as starter:
+            futures = [starter.submit(self._start_worker) for _ in range(n)]
+        for future in futures:
+            if future.exception() is None:
+                w = future.result()
+                self._workers.append(w)
+                self._pool.put(w)
+        for future in futures:
+            future.result()   # re-raise the first startup failure, if any
+        log.debug("mkdocs-markdoc: started %d Node.js worker(s)", n)
 
     def _start_worker(self) -> subprocess.Popen:
         """Spawn one persistent Node.js worker process."""
         cmd = [self._node_exec, str(_RUNNER_PATH)]
         if self.config["markdoc_config"]:
             cmd += ["--config", self.config["markdoc_config"]]
-        return subprocess.Popen(
+        worker = subprocess.Popen(
             cmd,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=None,   # inherit – unexpected Node crashes surface immediately
-            text=True,
-            encoding="utf-8",
         )
+        if self._pipe_size:
+            for pipe in (worker.stdin, worker.stdout):
+                if not _enlarge_pipe(pipe.fileno(), self._pipe_size):
+                    self._pipe_size = 0   # pipe limit spent; stop resizing
+                    break
+        # Windows cannot select() on pipes, so there a reader thread queues
+        # each frame and _read_frame waits on the queue instead.
+        if os.name == "posix":
+            sel = selectors.DefaultSelector()
+            sel.register(worker.stdout, selectors.EVENT_READ)
+            self._selectors[worker] = sel
+        else:
+            frames: Queue[bytes | None] = Queue()
+            threading.Thread(
+                target=_read_frames, args=(worker.stdout, frames), daemon=True
+            ).start()
+            self._frames[worker] = frames
+        self._await_ready(worker)
+        return worker
+
+    def _await_ready(self, worker: subprocess.Popen) -> None:
+        """
+        Wait for *worker*'s startup handshake.
+
+        The runner reports {"ready": true, ...} once Markdoc and the user
+        config are loaded, or {"error": ...} if either failed, so a broken
+        install is caught here without a separate Node.js probe process.
+        The handshake is kept for _cache_key_salt.
+        """
+        timeout_ms = self._timeout_ms
+        try:
+            handshake = json.loads(
+                self._read_frame(worker, time.monotonic() + timeout_ms / 1000)
+            )
+        except TimeoutError:
+            worker.kill()
+            raise RuntimeError(
+                f"mkdocs-markdoc: Node.js worker did not start within {timeout_ms} ms."
+            ) from None
+        except EOFError:
+            handshake = {"error": "the runner exited during startup; see Node.js output above."}
+
+        if "error" in handshake:
+            raise RuntimeError(
+                "mkdocs-markdoc: the Node.js Markdoc runner failed to start.  Make "
+                "sure @markdoc/markdoc is installed (`npm install @markdoc/markdoc`, "
+                "globally or in the project directory) and that `markdoc_config` "
+                f"loads.\nNode error: {handshake['error']}"
+            )
+        self._handshake = handshake
 
-    def _render_with_pool(self, markdown: str, src_path: str) -> str:
+    def _render_with_pool(self, markdown: bytes, src_path: str) -> str:
         """Check out a worker, render, return the worker to the pool."""
+        response = self._load_rendered(markdown)
+        if response is not None:
+            return self._unpack(response, src_path)
+
         worker = self._pool.get()
         try:
             return self._render(markdown, src_path, worker)
         finally:
             self._pool.put(worker)
 
-    def _render(self, markdown: str, src_path: str, worker: subprocess.Popen) -> str:
-        """Send one page to *worker* over the JSON line protocol and return HTML."""
+    def _render_batch_with_pool(
+        self, sources: list[bytes], src_paths: list[str]
+    ) -> list[dict]:
+        """Check out a worker, render a batch, return the worker to the pool."""
+        worker = self._pool.get()
+        try:
+            return self._render_batch(sources, src_paths, worker)
+        finally:
+            self._pool.put(worker)
+
+    def _render(self, markdown: bytes, src_path: str, worker: subprocess.Popen) -> str:
+        """Send one page to *worker* and return its HTML."""
+        [response] = self._request(worker, [markdown], [src_path])
+        self._save_rendered(markdown, response)
+        return self._unpack(response, src_path)
+
+    def _render_batch(
+        self, sources: list[bytes], src_paths: list[str], worker: subprocess.Popen
+    ) -> list[dict]:
+        """
+        Send several pages to *worker* as one batch request.
+
+        Returns the raw runner response for each source, in order.  They are
+        unpacked in on_page_markdown, so warnings and errors are reported
+        against every page that shares a source, and one broken page does
+        not fail the rest of its batch.
+        """
+        responses = self._request(worker, sources, src_paths)
+        for source, response in zip(sources, responses):
+            self._save_rendered(source, response)
+        return responses
+
+    def _request(
+        self, worker: subprocess.Popen, sources: list[bytes], src_paths: list[str]
+    ) -> list[dict]:
+        """
+        Send *sources* to *worker* as one framed request and return one
+        response dict per page, in order.
+
+        Every frame is a 4-byte big-endian length followed by that many bytes.
+        A request is a bare page count followed by one UTF-8 Markdown frame
+        per page; each page's reply is a JSON metadata frame (toc, warnings or
+        error) followed by a frame of raw HTML.
+
+        Sources are passed as the bytes read from disk and written to the pipe
+        unchanged, so Markdown is never decoded and re-encoded in Python.
+
+        The runner replies to each page as soon as it is rendered, so the
+        timeout applies to every page on its own and a hung page is reported
+        by name.
+        """
         if worker.poll() is not None:
             raise RuntimeError(
                 f"mkdocs-markdoc: Node.js worker exited unexpectedly "
-                f"while processing '{src_path}'."
+                f"while processing '{src_paths[0]}'."
             )
 
-        msg = json.dumps({"markdown": markdown}) + "\n"
-        worker.stdin.write(msg)
+        worker.stdin.write(_FRAME_HEADER.pack(len(sources)))
+        for source in sources:
+            worker.stdin.write(_FRAME_HEADER.pack(len(source)))
+            worker.stdin.write(source)
         worker.stdin.flush()
 
-        # Read the response in a background thread to honour the timeout.
-        q: Queue[str | Exception] = Queue()
-
-        def _read() -> None:
-            try:
-                q.put(worker.stdout.readline())
-            except Exception as exc:  # noqa: BLE001
-                q.put(exc)
-
-        threading.Thread(target=_read, daemon=True).start()
-
-        timeout_s = self.config["timeout"] / 1000
+        timeout_ms = self._timeout_ms
+        responses: list[dict] = []
         try:
-            result = q.get(timeout=timeout_s)
-        except Empty:
+            for src_path in src_paths:
+                deadline = time.monotonic() + timeout_ms / 1000
+                response = json.loads(self._read_frame(worker, deadline))
+                response["html"] = self._read_frame(worker, deadline).decode("utf-8")
+                responses.append(response)
+        except TimeoutError:
             worker.kill()
             raise RuntimeError(
-                f"mkdocs-markdoc: Node.js timed out after {self.config['timeout']} ms "
+                f"mkdocs-markdoc: Node.js timed out after {timeout_ms} ms "
                 f"while processing '{src_path}'."
-            )
-
-        if isinstance(result, Exception):
-            raise RuntimeError(
-                f"mkdocs-markdoc: error reading from Node.js worker: {result}"
-            )
-
-        if not result:
+            ) from None
+        except EOFError:
             raise RuntimeError(
                 f"mkdocs-markdoc: Node.js worker exited unexpectedly while "
                 f"processing '{src_path}'."
-            )
+            ) from None
+        except OSError as exc:
+            raise RuntimeError(
+                f"mkdocs-markdoc: error reading from Node.js worker: {exc}"
+            ) from exc
+        return responses
+
+    def _read_frame(self, worker: subprocess.Popen, deadline: float) -> bytes:
+        """
+        Read one length-prefixed frame from *worker*'s stdout before *deadline*.
+
+        Raises TimeoutError past the deadline and EOFError if the worker
+        closes its stdout.
+        """
+        frames = self._frames.get(worker)
+        if frames is not None:
+            try:
+                body = frames.get(timeout=max(deadline - time.monotonic(), 0))
+            except Empty:
+                raise TimeoutError from None
+            if body is None:
+                frames.put(None)   # keep reporting EOF to later reads
+                raise EOFError
+            return body
+        (n,) = _FRAME_HEADER.unpack(self._read_exact(worker, _FRAME_HEADER.size, deadline))
+        return self._read_exact(worker, n, deadline)
+
+    def _read_exact(self, worker: subprocess.Popen, n: int, deadline: float) -> bytes:
+        """
+        Read exactly *n* bytes from *worker*'s stdout before *deadline*.
 
-        response = json.loads(result)
+        Reads go straight to the pipe's file descriptor, with the worker's
+        selector bounding each wait, so no thread is needed to enforce the
+        timeout.  Raises TimeoutError past the deadline and EOFError if the
+        worker closes its stdout.
+        """
+        fd = worker.stdout.fileno()
+        sel = self._selectors[worker]
+        chunks: list[bytes] = []
+
+        while n:
+            if not sel.select(max(deadline - time.monotonic(), 0)):
+                raise TimeoutError
+            chunk = os.read(fd, n)
+            if not chunk:
+                raise EOFError
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
+
+    def _unpack(self, response: dict, src_path: str) -> str:
+        """
+        Turn one page's runner response into HTML, logging any warnings.
 
+        The page's heading list is stashed for on_page_content.
+        """
         if "error" in response:
             raise RuntimeError(
                 f"mkdocs-markdoc: Markdoc rendering failed for '{src_path}'.\n"
@@ -375,6 +728,9 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
         for warning in response.get("warnings", []):
             log.warning("mkdocs-markdoc [%s]: %s", src_path, warning)
 
+        if "toc" in response:
+            self._tocs[src_path] = response["toc"]
+
         html = response["html"]
         if not html:
             log.warning(
@@ -384,6 +740,71 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
 
         return html
 
+    def _cache_key_salt(self) -> bytes:
+        """
+        Hash everything besides the page source that can change its output.
+
+        That is the bundled runner, the Markdoc and Node.js versions, the
+        user's Markdoc config and every module the runner loaded through
+        require() (the config's tag files, for instance), as reported in the
+        worker handshake.
+        """
+        handshake = self._handshake
+        salt = hashlib.blake2b(_RUNNER_PATH.read_bytes())
+        salt.update(json.dumps([handshake.get("markdoc"), handshake.get("node")]).encode())
+        if self.config["markdoc_config"]:
+            salt.update(Path(self.config["markdoc_config"]).read_bytes())
+        for module in sorted(handshake.get("modules", [])):
+            salt.update(module.encode("utf-8"))
+            try:
+                salt.update(Path(module).read_bytes())
+            except OSError:
+                pass
+        return salt.digest()
+
+    def _cache_path(self, source: bytes) -> Path:
+        """Location of the on-disk cache entry for a page with *source*."""
+        key = hashlib.blake2b(source, digest_size=20, key=self._cache_salt).hexdigest()
+        return self._cache_dir / key[:2] / f"{key}.json"
+
+    def _load_rendered(self, source: bytes) -> dict | None:
+        """Return the cached runner response for *source*, or None on a miss."""
+        if self._cache_dir is None:
+            return None
+        path = self._cache_path(source)
+        self._cache_used.add(path)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                response = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        return response if isinstance(response, dict) and "html" in response else None
+
+    def _save_rendered(self, source: bytes, response: dict) -> None:
+        """
+        Store a successful runner response for *source* in the on-disk cache.
+
+        The entry is written to a temporary file and renamed into place so
+        concurrent builds never observe a partial file.  Failures are logged
+        and otherwise ignored: the cache is an optimisation only.
+        """
+        if self._cache_dir is None or "error" in response:
+            return
+        path = self._cache_path(source)
+        self._cache_used.add(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    json.dump(response, fh)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as exc:
+            log.debug("mkdocs-markdoc: could not write render cache entry %s: %s", path, exc)
+
     def _rewrite_md_links(self, html: str, page: Page, files: Files) -> str:
         """
         Rewrite relative .md hrefs to their MkDocs output URLs.
@@ -426,7 +847,7 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
 
     def _inject_permalinks(self, html: str) -> str:
         """Append a permalink anchor to every heading that has an id attribute."""
-        symbol = self.config["permalink"]
+        symbol = self._permalink
 
         def add_link(m: re.Match) -> str:
             tag, attrs, body = m.group(1), m.group(2), m.group(3)
@@ -445,12 +866,3 @@ class MarkdocPlugin(BasePlugin[MarkdocPluginConfig]):
             html,
             flags=re.DOTALL,
         )
-
-    def _run_node(self, script: str) -> subprocess.CompletedProcess:
-        """Run an inline Node.js *script* string for quick checks."""
-        return subprocess.run(
-            [self._node_exec, "-e", script],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
@@ -0,0 +1,88 @@
+"""
+Tests that drive the bundled Node.js runner through the plugin's worker pool.
+
+They need Node.js and @markdoc/markdoc (installed globally, in the project or
+via NODE_PATH) and are skipped when either is missing.
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+
+import pytest
+
+from mkdocs_markdoc.plugin import _RUNNER_PATH, MarkdocPlugin
+
+
+def _markdoc_available() -> bool:
+    node = shutil.which("node")
+    if node is None:
+        return False
+    probe = subprocess.run(
+        [node, "-e", "require.resolve('@markdoc/markdoc')"],
+        cwd=_RUNNER_PATH.parent,
+        capture_output=True,
+        check=False,
+    )
+    return probe.returncode == 0
+
+
+pytestmark = pytest.mark.skipif(
+    not _markdoc_available(), reason="Node.js with @markdoc/markdoc is required"
+)
+
+# A self-closing tag that keeps the runner busy for 200 ms per use.
+SLOW_TAG_CONFIG = """
+module.exports = {
+  tags: {
+    slow: {
+      selfClosing: true,
+      transform() {
+        const end = Date.now() + 200;
+        while (Date.now() < end) {}
+        return "";
+      },
+    },
+  },
+};
+"""
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    config = tmp_path / "markdoc.config.js"
+    config.write_text(SLOW_TAG_CONFIG)
+    plugin = MarkdocPlugin()
+    errors, _ = plugin.load_config(
+        {"markdoc_config": str(config), "timeout": 1000, "workers": 1}
+    )
+    assert not errors
+    plugin.on_config({"config_file_path": str(tmp_path / "mkdocs.yml")})
+    plugin._start_pool(1)
+    yield plugin
+    plugin.on_shutdown()
+
+
+def test_reply_larger_than_pipe_is_not_held_back_by_later_pages(plugin):
+    # The first reply is far larger than any pipe buffer; the slow pages after
+    # it take 1.6 s in total.  Each page must still get its own 1 s timeout,
+    # so the large reply has to reach Python before the slow pages finish.
+    big = ("word " * 800_000).encode("utf-8")
+    sources = [big] + [b"{% slow /%}\n"] * 8
+    src_paths = ["big.md"] + [f"slow{i}.md" for i in range(8)]
+
+    responses = plugin._request(plugin._pool.get(), sources, src_paths)
+
+    assert len(responses) == len(sources)
+    assert all("error" not in response for response in responses)
+    assert responses[0]["html"].count("word") == 800_000
+
+
+def test_toc_text_keeps_numbers_the_html_renderer_prints(plugin):
+    source = b"---\nversion: 2\n---\n# Release {% $frontmatter.version %}\n"
+
+    [response] = plugin._request(plugin._pool.get(), [source], ["release.md"])
+
+    assert "Release 2" in response["html"]
+    assert [heading["text"] for heading in response["toc"]] == ["Release 2"]